@@ -0,0 +1,94 @@
+"""
+Optional Redis cache (enabled with USE_REDIS_CACHE)
+"""
+
+import logging
+from typing import Iterable, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis():
+    """Get the shared Redis client, or None when caching is disabled"""
+    global _client
+    if not settings.USE_REDIS_CACHE:
+        return None
+    if _client is None:
+        import redis.asyncio as redis
+        _client = redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Get a cached value (None on miss, when disabled, or on Redis errors)"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return await client.get(key)
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl: int) -> None:
+    """Cache a value for ttl seconds"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.set(key, value, ex=ttl)
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
+
+
+async def cache_smembers(key: str) -> Set[str]:
+    """Get the members of a cached set (empty on miss, when disabled, or on Redis errors)"""
+    client = get_redis()
+    if client is None:
+        return set()
+    try:
+        return {member.decode() for member in await client.smembers(key)}
+    except Exception as e:
+        logger.warning(f"Cache read failed for {key}: {str(e)}")
+        return set()
+
+
+async def cache_sadd(key: str, members: Iterable[str], ttl: int) -> None:
+    """Add members to a cached set and (re)set its TTL in seconds"""
+    client = get_redis()
+    members = list(members)
+    if client is None or not members:
+        return
+    try:
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.sadd(key, *members)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Cache write failed for {key}: {str(e)}")
+
+
+async def cache_delete_pattern(pattern: str) -> None:
+    """Delete all keys matching a glob pattern"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        keys = [key async for key in client.scan_iter(match=pattern)]
+        if keys:
+            await client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Cache invalidation failed for {pattern}: {str(e)}")
+
+
+async def close_redis() -> None:
+    """Close the Redis connection pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -3,7 +3,8 @@ Configuration management for the AI Chat Application
 """
 
 from pydantic_settings import BaseSettings
-from typing import List, Union
+from typing import List, Optional, Union
+from functools import lru_cache
 import os
 from pathlib import Path
 
@@ -20,17 +21,22 @@ class Settings(BaseSettings):
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
     APP_RELOAD: bool = True
+    # Worker processes when not reloading; with more than one, run.py resets
+    # the chatbots once up front and workers only seed an empty database
+    APP_WORKERS: int = 1
     DEBUG: bool = True
     
     # OpenAI Configuration
-    OPENAI_API_KEY: str
+    # Optional at import time; validated when the OpenAI client is first built
+    OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o"
     OPENAI_MAX_TOKENS: int = 4096
     OPENAI_TEMPERATURE: float = 0.7
     
     # Database Configuration
     DATABASE_URL: str = f"sqlite+aiosqlite:///{BASE_DIR}/chat_app.db"
-    DATABASE_ECHO: bool = False
+    DATABASE_ECHO: bool = False  # Local debugging only: logs every SQL statement
+    DATABASE_INSERT_PAGE_SIZE: int = 1000  # Rows per batched multi-VALUES INSERT
     
     # Redis Configuration (optional)
     REDIS_URL: str = "redis://localhost:6379"
@@ -76,8 +82,14 @@ class Settings(BaseSettings):
         extra = "allow"
 
 
-# Create settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings instance (parsed once, then memoized)"""
+    return Settings()
+
+
+# Module-level instance for non-request code paths (engine, CORS, lifespan)
+settings = get_settings()
 
 # Ensure directories exist
 Path(settings.STATIC_DIR).mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -4,11 +4,15 @@ Database configuration and session management
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import MetaData
+import asyncio
+import logging
+from sqlalchemy import MetaData, event, text
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create Base class for models
 metadata = MetaData()
 Base = declarative_base(metadata=metadata)
@@ -18,8 +22,22 @@ engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DATABASE_ECHO,
     future=True,
+    # Multi-row inserts (bulk seeding, executemany) are sent as batched
+    # INSERT ... VALUES (...), (...) statements of up to this many rows
+    insertmanyvalues_page_size=settings.DATABASE_INSERT_PAGE_SIZE,
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Per-connection SQLite tuning (WAL itself is set once in init_db)"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -60,9 +78,48 @@ async def get_db_context():
 async def init_db():
     """Initialize database - create all tables"""
     async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Persistent per database file: readers no longer block on writes
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+        
         # Import all models to ensure they are registered
         from app.models import chat, user, chatbot
         await conn.run_sync(Base.metadata.create_all)
+        
+        # Backfill indexes on databases created before they were declared
+        await conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_chat_messages_session_created "
+            "ON chat_messages (session_id, created_at)"
+        )
+        await conn.exec_driver_sql("DROP INDEX IF EXISTS ix_chat_messages_session_id")
+        for index in chatbot.Chatbot.__table__.indexes:
+            await conn.run_sync(index.create, checkfirst=True)
+        
+        if engine.dialect.name == "postgresql":
+            # Trigram index so chatbot search (ILIKE '%term%') avoids a seq scan.
+            # Creating the extension needs elevated privileges on many hosted
+            # setups, so run it in a savepoint and continue without it on failure
+            try:
+                async with conn.begin_nested():
+                    await conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                    await conn.exec_driver_sql(
+                        "CREATE INDEX IF NOT EXISTS ix_chatbots_search_trgm ON chatbots "
+                        "USING gin (name gin_trgm_ops, description gin_trgm_ops)"
+                    )
+            except Exception as e:
+                logger.warning(f"Skipping trigram search index: {str(e)}")
+
+
+async def warm_db_pool():
+    """Open pooled connections up front so the first requests don't pay for them"""
+    # Pools without a fixed size (e.g. NullPool) just get one probe connection
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    
+    await asyncio.gather(*(ping() for _ in range(size)))
 
 
 async def close_db():
@@ -2,18 +2,23 @@
 FastAPI main application
 """
 
+import asyncio
+import hashlib
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response
 
-from app.core.config import settings
-from app.core.database import init_db, close_db
+from app.core.config import Settings, settings, get_settings
+from app.core.cache import close_redis, get_redis
+from app.core.database import init_db, close_db, warm_db_pool
 from app.routers import chat, chatbots
 from app.utils.seed_data import seed_initial_chatbots
+from app.services.usage_counter import run_usage_flusher, flush_usage_counts
+from app.services.openai_service import close_openai_client
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +27,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Keep SQL statement rendering off the request path regardless of root level
+logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
+logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -29,11 +38,46 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up application...")
     await init_db()
-    await seed_initial_chatbots()  # Seed chatbots if database is empty
+    
+    # Serve the SPA shell from memory (restart to pick up index.html edits)
+    index_path = Path(settings.STATIC_DIR) / "index.html"
+    app.state.index_html = index_path.read_bytes() if index_path.is_file() else None
+    if app.state.index_html is not None:
+        app.state.index_etag = f'"{hashlib.md5(app.state.index_html).hexdigest()}"'
+    
+    async def prefetch_anonymous_user():
+        app.state.anonymous_user = await chat.load_anonymous_user()
+    
+    # Reset chatbots to the seed set; with several workers the launcher has
+    # already done it once, and a per-worker recreate would wipe the chatbots
+    # and sessions of workers that are already serving
+    multi_worker = settings.APP_WORKERS > 1 and not settings.APP_RELOAD
+    seed_mode = "if_empty" if multi_worker else "recreate"
+    
+    # Independent once the schema exists
+    await asyncio.gather(
+        seed_initial_chatbots(mode=seed_mode),
+        warm_db_pool(),
+        prefetch_anonymous_user(),
+    )
+    
+    # Periodically move Redis-buffered usage counts into the database
+    usage_flusher = asyncio.create_task(run_usage_flusher()) if get_redis() is not None else None
     yield
     # Shutdown
     logger.info("Shutting down application...")
+    if usage_flusher is not None:
+        # Wait for the task to stop (it finishes any in-progress flush)
+        usage_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await usage_flusher
+        try:
+            await flush_usage_counts()
+        except Exception as e:
+            logger.error(f"Error flushing usage counts: {str(e)}")
+    await close_openai_client()
     await close_db()
+    await close_redis()
 
 
 # Create FastAPI app
@@ -64,12 +108,19 @@ app.include_router(chatbots.router)
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Serve the main application"""
-    index_path = Path(settings.STATIC_DIR) / "index.html"
-    return FileResponse(index_path)
+    index_html = getattr(request.app.state, "index_html", None)
+    if index_html is None:
+        index_path = Path(settings.STATIC_DIR) / "index.html"
+        return FileResponse(index_path)
+    
+    etag = request.app.state.index_etag
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=index_html, media_type="text/html", headers={"ETag": etag})
 
 
 @app.get("/health")
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """Health check endpoint"""
     return {
         "status": "healthy",
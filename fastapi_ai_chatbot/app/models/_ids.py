@@ -0,0 +1,10 @@
+"""
+Primary key helpers shared by all models
+"""
+
+import uuid
+
+
+def generate_uuid():
+    """Random UUID as 32 hex characters (no hyphens)"""
+    return uuid.uuid4().hex
@@ -0,0 +1,9 @@
+"""
+Timestamp helpers shared by all models
+"""
+
+from datetime import datetime, timezone
+from functools import partial
+
+# Column default/onupdate callable for timezone-aware UTC timestamps
+utcnow = partial(datetime.now, timezone.utc)
@@ -2,16 +2,12 @@
 Chat session and message models
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
-import uuid
 import enum
 from app.core.database import Base
-
-
-def generate_uuid():
-    return str(uuid.uuid4())
+from app.models._ids import generate_uuid
+from app.models._time import utcnow
 
 
 class MessageRole(str, enum.Enum):
@@ -51,9 +47,9 @@ class ChatSession(Base):
     system_prompt_override = Column(Text, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
-    last_activity = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    last_activity = Column(DateTime, default=utcnow)
     
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
@@ -80,7 +76,7 @@ class ChatMessage(Base):
     __tablename__ = "chat_messages"
     
     id = Column(String, primary_key=True, default=generate_uuid)
-    session_id = Column(String, ForeignKey("chat_sessions.id"), nullable=False, index=True)
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False)
     
     # Message content
     role = Column(SQLEnum(MessageRole), nullable=False)
@@ -101,12 +97,25 @@ class ChatMessage(Base):
     is_hidden = Column(Boolean, default=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     # Relationships
     session = relationship("ChatSession", back_populates="messages")
     
+    __table_args__ = (
+        # Serves per-session history ordered by creation time
+        Index("ix_chat_messages_session_created", "session_id", "created_at"),
+    )
+    
+    @property
+    def created_at_iso(self):
+        """ISO formatted created_at, memoized (messages are never re-timestamped)"""
+        iso = self.__dict__.get("_created_at_iso")
+        if iso is None and self.created_at:
+            iso = self._created_at_iso = self.created_at.isoformat()
+        return iso
+    
     def to_dict(self):
         """Convert model to dictionary"""
         return {
@@ -119,7 +128,7 @@ class ChatMessage(Base):
             "tool_call_id": self.tool_call_id,
             "tool_arguments": self.tool_arguments,
             "tool_output": self.tool_output,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "created_at": self.created_at_iso,
         }
     
     def to_openai_format(self):
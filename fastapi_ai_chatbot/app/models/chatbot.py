@@ -2,15 +2,13 @@
 Chatbot model for managing different AI assistants
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, Float
+from sqlalchemy import Column, String, Text, DateTime, Boolean, JSON, Integer, Float, Index
+from functools import cached_property
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
-import uuid
+from app.core.config import settings
 from app.core.database import Base
-
-
-def generate_uuid():
-    return str(uuid.uuid4())
+from app.models._ids import generate_uuid
+from app.models._time import utcnow
 
 
 class Chatbot(Base):
@@ -50,12 +48,43 @@ class Chatbot(Base):
     rating = Column(Float, default=0.0)
     
     # Timestamps
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     # Relationships
     chat_sessions = relationship("ChatSession", back_populates="chatbot", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Listing feed: active bots ordered by featured, then usage
+        Index(
+            "ix_chatbots_feed",
+            is_featured.desc(),
+            usage_count.desc(),
+            sqlite_where=is_active == True,
+            postgresql_where=is_active == True,
+            postgresql_include=["id", "name", "slug", "category"],
+        ),
+        Index(
+            "ix_chatbots_category",
+            category,
+            sqlite_where=is_active == True,
+            postgresql_where=is_active == True,
+        ),
+    )
+    
+    @cached_property
+    def sampling_kwargs(self):
+        """OpenAI completion parameters with app-wide defaults filled in"""
+        # Computed once per instance; chatbot_cache reloads fresh snapshots
+        return {
+            "model": self.model or settings.OPENAI_MODEL,
+            "temperature": settings.OPENAI_TEMPERATURE if self.temperature is None else self.temperature,
+            "max_tokens": self.max_tokens or settings.OPENAI_MAX_TOKENS,
+            "top_p": 1.0 if self.top_p is None else self.top_p,
+            "frequency_penalty": 0.0 if self.frequency_penalty is None else self.frequency_penalty,
+            "presence_penalty": 0.0 if self.presence_penalty is None else self.presence_penalty,
+        }
+    
     def to_dict(self):
         """Convert model to dictionary"""
         return {
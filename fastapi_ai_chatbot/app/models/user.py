@@ -4,13 +4,9 @@ User and Session models
 
 from sqlalchemy import Column, String, DateTime, Boolean, JSON, ForeignKey
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
-import uuid
 from app.core.database import Base
-
-
-def generate_uuid():
-    return str(uuid.uuid4())
+from app.models._ids import generate_uuid
+from app.models._time import utcnow
 
 
 class User(Base):
@@ -24,8 +20,8 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_anonymous = Column(Boolean, default=True)
     preferences = Column(JSON, default=dict)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, default=utcnow)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     # Relationships
     sessions = relationship("Session", back_populates="user", cascade="all, delete-orphan")
@@ -42,8 +38,8 @@ class Session(Base):
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
-    last_activity = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    last_activity = Column(DateTime, default=utcnow)
+    created_at = Column(DateTime, default=utcnow)
     expires_at = Column(DateTime, nullable=False)
     
     # Relationships
@@ -2,22 +2,29 @@
 Chat API routes with SSE streaming
 """
 
-import json
 import asyncio
 import logging
+import time
+import orjson
+import msgspec
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from sse_starlette import EventSourceResponse
 
-from app.core.database import get_db
-from app.services.openai_service import OpenAIService
+from app.core.database import get_db, get_db_context
+from app.services.openai_service import (
+    OpenAIService,
+    SSE_DATA_PREFIX,
+    SSE_SEPARATOR,
+    SSE_DONE_FRAME,
+)
 from app.services.chat_service import ChatService
+from app.services.history_cache import history_cache
+from app.services.chatbot_cache import get_chatbot
 from app.models.chat import MessageRole, MessageType
-from app.models.chatbot import Chatbot
 from app.models.user import User
 import uuid
 
@@ -27,13 +34,21 @@ router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 
 # Request/Response models
-class ChatRequest(BaseModel):
-    """Chat request model"""
+class ChatRequest(msgspec.Struct):
+    """Chat request model (msgspec for fast decoding on the streaming path)"""
     session_id: str
     message: str
     tools: Optional[List[Dict[str, Any]]] = None
 
 
+async def parse_chat_request(request: Request) -> ChatRequest:
+    """Decode and validate the chat request body"""
+    try:
+        return msgspec.json.decode(await request.body(), type=ChatRequest)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
 class CreateSessionRequest(BaseModel):
     """Create session request model"""
     chatbot_id: str
@@ -50,39 +65,56 @@ class SessionResponse(BaseModel):
     last_activity: str
 
 
+# SSE batching: flush after this many frames or this many seconds
+SSE_BATCH_SIZE = 8
+SSE_FLUSH_INTERVAL = 0.01
+# Events that are flushed immediately so completion isn't delayed
+SSE_IMMEDIATE_EVENTS = {"response.output_item.done", "response.completed", "error"}
+
+
 # Global user for simplicity - in production use proper auth
 ANONYMOUS_USER_ID = "anonymous_user_001"
 
-# Dependency to get or create anonymous user
-async def get_current_user(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get or create anonymous user from session"""
+async def load_anonymous_user() -> User:
+    """Get or create the shared anonymous user"""
     # For simplicity, we'll use a single anonymous user
     # In production, implement proper authentication
+    async with get_db_context() as db:
+        user = await db.get(User, ANONYMOUS_USER_ID)
+        if not user:
+            user = User(
+                id=ANONYMOUS_USER_ID,
+                is_anonymous=True,
+                username="anonymous_user"
+            )
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+            logger.info(f"Created anonymous user {ANONYMOUS_USER_ID}")
     
-    user_id = ANONYMOUS_USER_ID
-    
-    # Get or create user
-    user = await db.get(User, user_id)
-    if not user:
-        user = User(
-            id=user_id,
-            is_anonymous=True,
-            username="anonymous_user"
-        )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
-        logger.info(f"Created anonymous user {user_id}")
+    return user
+
+
+# Dependency to get the anonymous user (cached on app.state at startup)
+async def get_current_user(request: Request) -> User:
+    """Get the anonymous user, hitting the database only on cache miss"""
+    user = getattr(request.app.state, "anonymous_user", None)
+    if user is None:
+        user = await load_anonymous_user()
+        request.app.state.anonymous_user = user
     
     return user
 
 
+async def _touch_session(session_id: str, message_count: int) -> None:
+    """Apply deferred session counter updates on a dedicated db session"""
+    async with get_db_context() as db:
+        await ChatService.touch_session(db, session_id, message_count)
+
+
 @router.post("/stream")
 async def stream_chat(
-    request: ChatRequest,
+    request: ChatRequest = Depends(parse_chat_request),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
@@ -93,19 +125,32 @@ async def stream_chat(
     """
     try:
         logger.info(f"Looking for session {request.session_id} for user {user.id}")
-        # Get session with messages
-        session = await ChatService.get_session(db, request.session_id, user.id)
+        # Serve history from cache when possible; only load messages on a miss
+        history = await history_cache.get(request.session_id)
+        
+        # Get session (with messages on cache miss)
+        session = await ChatService.get_session(
+            db,
+            request.session_id,
+            user.id,
+            with_chatbot=False,
+            with_messages=history is None
+        )
         if not session:
             logger.error(f"Session {request.session_id} not found for user {user.id}")
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Get chatbot configuration
-        chatbot = await db.get(Chatbot, session.chatbot_id)
+        # Get chatbot configuration (cached snapshot)
+        chatbot = await get_chatbot(db, session.chatbot_id)
         if not chatbot:
             raise HTTPException(status_code=404, detail="Chatbot not found")
         
+        # Create OpenAI service (fails fast if no API key is configured,
+        # before anything is written for this turn)
+        openai_service = OpenAIService()
+        
         # Add user message
-        user_message = await ChatService.add_message(
+        await ChatService.add_message_core(
             db,
             session_id=request.session_id,
             role=MessageRole.USER,
@@ -113,25 +158,75 @@ async def stream_chat(
             message_type=MessageType.MESSAGE
         )
         
-        # Get all session messages for context
-        messages = await ChatService.get_session_messages(db, request.session_id)
+        # Backfill the cache from the database on a miss, windowed like the
+        # cache so the model sees the same context either way
+        if history is None:
+            history = OpenAIService.to_openai_messages(session.messages)[-history_cache.max_messages:]
+            await history_cache.set(request.session_id, history)
         
-        # Create OpenAI service
-        openai_service = OpenAIService()
+        # Context: history plus the new user turn
+        user_turn = {"role": "user", "content": request.message}
+        await history_cache.append(request.session_id, user_turn)
+        messages = [*history, user_turn]
         
         async def generate():
             """Generate SSE events"""
+            # Coalesce fast token deltas into fewer writes; a frame waits in
+            # the buffer at most SSE_FLUSH_INTERVAL
+            buffer: List[bytes] = []
+            buffered_at = 0.0
+            # Messages written without bumping session counters (user turn)
+            added_messages = 1
+            # Stream from OpenAI
+            events = openai_service.stream_chat(
+                messages=messages,
+                chatbot=chatbot,
+                session_id=request.session_id,
+                tools=request.tools
+            )
+            # Next event being read; kept across flush timeouts, never cancelled
+            # mid-read so the upstream generator stays intact
+            pending = None
             try:
-                # Stream from OpenAI
-                async for event in openai_service.stream_chat(
-                    messages=messages,
-                    chatbot=chatbot,
-                    session_id=request.session_id,
-                    tools=request.tools
-                ):
+                while True:
+                    if pending is None:
+                        pending = asyncio.ensure_future(events.__anext__())
+                    
+                    if buffer:
+                        timeout = buffered_at + SSE_FLUSH_INTERVAL - time.monotonic()
+                        done, _ = await asyncio.wait({pending}, timeout=max(timeout, 0))
+                        if not done:
+                            yield b"".join(buffer)
+                            buffer.clear()
+                            continue
+                    
+                    try:
+                        event = await pending
+                    except StopAsyncIteration:
+                        break
+                    finally:
+                        pending = None
+                    
+                    if not buffer:
+                        buffered_at = time.monotonic()
+                    
+                    # Token deltas arrive pre-encoded; buffer them as-is
+                    if isinstance(event, bytes):
+                        buffer.append(event)
+                        if len(buffer) >= SSE_BATCH_SIZE:
+                            yield b"".join(buffer)
+                            buffer.clear()
+                        continue
+                    
                     # Format as SSE
-                    sse_data = json.dumps(event)
-                    yield f"data: {sse_data}\n\n"
+                    buffer.append(SSE_DATA_PREFIX + orjson.dumps(event) + SSE_SEPARATOR)
+                    
+                    if (
+                        event.get("event") in SSE_IMMEDIATE_EVENTS
+                        or len(buffer) >= SSE_BATCH_SIZE
+                    ):
+                        yield b"".join(buffer)
+                        buffer.clear()
                     
                     # Save assistant message when complete
                     if event.get("event") == "response.output_item.done":
@@ -144,16 +239,25 @@ async def stream_chat(
                                     break
                             
                             if content_text:
-                                await ChatService.add_message(
-                                    db,
-                                    session_id=request.session_id,
-                                    role=MessageRole.ASSISTANT,
-                                    content=content_text,
-                                    message_type=MessageType.MESSAGE
+                                # Own db session: the request's dependency has
+                                # already exited by the time the body streams
+                                async with get_db_context() as message_db:
+                                    await ChatService.add_message_core(
+                                        message_db,
+                                        session_id=request.session_id,
+                                        role=MessageRole.ASSISTANT,
+                                        content=content_text,
+                                        message_type=MessageType.MESSAGE
+                                    )
+                                added_messages += 1
+                                await history_cache.append(
+                                    request.session_id,
+                                    {"role": "assistant", "content": content_text}
                                 )
                 
                 # Send done signal
-                yield "data: [DONE]\n\n"
+                buffer.append(SSE_DONE_FRAME)
+                yield b"".join(buffer)
                 
             except Exception as e:
                 logger.error(f"Error in stream generation: {str(e)}")
@@ -161,10 +265,27 @@ async def stream_chat(
                     "event": "error",
                     "data": {"message": str(e)}
                 }
-                sse_error_data = json.dumps(error_event)
-                yield f"data: {sse_error_data}\n\n"
+                buffer.append(SSE_DATA_PREFIX + orjson.dumps(error_event) + SSE_SEPARATOR)
+                yield b"".join(buffer)
+            finally:
+                # Client went away mid-read: stop the upstream stream
+                if pending is not None:
+                    pending.cancel()
+                
+                # Update session counters once for the whole turn, also when
+                # the client disconnects (shielded from the response task's
+                # cancellation; own db session as the request's may be closing)
+                try:
+                    await asyncio.shield(_touch_session(request.session_id, added_messages))
+                except Exception as e:
+                    logger.error(f"Error updating session {request.session_id}: {str(e)}")
         
-        return EventSourceResponse(generate())
+        # Frames are already SSE-encoded, so stream them as-is
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
         
     except HTTPException:
         raise
@@ -264,12 +385,10 @@ async def get_session(
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        messages = await ChatService.get_session_messages(db, session_id)
-        
         return {
             "session": session.to_dict(),
             "chatbot": session.chatbot.to_dict() if session.chatbot else None,
-            "messages": [msg.to_dict() for msg in messages]
+            "messages": [msg.to_dict() for msg in session.messages]
         }
         
     except HTTPException:
@@ -306,17 +425,27 @@ async def export_session(
     format: str = Query("json", regex="^(json|markdown)$"),
     db: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user)
-) -> Dict[str, Any]:
+) -> Response:
     """Export session in specified format"""
     try:
+        if format == "markdown":
+            # Markdown is streamed as plain text instead of a JSON envelope
+            session = await ChatService.get_session(db, session_id, user.id, with_messages=False)
+            if not session:
+                raise ValueError(f"Session {session_id} not found")
+            return StreamingResponse(
+                ChatService.stream_markdown_export(session),
+                media_type="text/markdown; charset=utf-8"
+            )
+        
         export_data = await ChatService.export_session(
             db,
             session_id=session_id,
-            user_id=user.id,
-            format=format
+            user_id=user.id
         )
         
-        return export_data
+        # Already serialized; skip jsonable_encoder
+        return Response(content=export_data, media_type="application/json")
         
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
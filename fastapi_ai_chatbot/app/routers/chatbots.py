@@ -3,14 +3,19 @@ Chatbot management API routes
 """
 
 import logging
+from hashlib import blake2b
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, update, or_, and_
 from pydantic import BaseModel
 
+from app.core.cache import get_redis, cache_get, cache_set, cache_smembers, cache_sadd
 from app.core.database import get_db
+from app.core.responses import ORJSONResponse
 from app.models.chatbot import Chatbot
+from app.services.usage_counter import record_usage
 
 logger = logging.getLogger(__name__)
 
@@ -49,18 +54,145 @@ class CreateChatbotRequest(BaseModel):
     tools_enabled: List[str] = []
 
 
-@router.get("/", response_model=List[ChatbotResponse])
+# Columns exposed by ChatbotResponse, selected directly for list queries
+CHATBOT_RESPONSE_COLUMNS = (
+    Chatbot.id,
+    Chatbot.name,
+    Chatbot.slug,
+    Chatbot.description,
+    Chatbot.avatar_url,
+    Chatbot.category,
+    Chatbot.model,
+    Chatbot.suggested_prompts,
+    Chatbot.theme_color,
+    Chatbot.is_featured,
+    Chatbot.is_premium,
+    Chatbot.tags,
+    Chatbot.usage_count,
+    Chatbot.rating,
+    Chatbot.tools_enabled,
+)
+
+# JSON list columns that may be NULL and are returned as []
+JSON_LIST_FIELDS = ("suggested_prompts", "tags", "tools_enabled")
+
+
+# Read-through cache TTLs (seconds)
+CHATBOT_LIST_CACHE_TTL = 60
+CATEGORIES_CACHE_TTL = 300
+CHATBOT_CACHE_PREFIX = "chatbots:"
+
+
+def _cache_key(name: str, params: dict) -> str:
+    """Build a cache key from an endpoint name and its query parameters"""
+    digest = blake2b(orjson.dumps(params, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+    return f"{CHATBOT_CACHE_PREFIX}{name}:{digest}"
+
+
+def _json_with_etag(request: Request, body: bytes) -> Response:
+    """Return pre-rendered JSON with an ETag, or 304 if the client has it"""
+    etag = f'"{blake2b(body, digest_size=8).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _row_payload(row) -> dict:
+    """Build the ChatbotResponse-shaped dict from a projected row mapping"""
+    payload = dict(row)
+    for field in JSON_LIST_FIELDS:
+        if payload[field] is None:
+            payload[field] = []
+    return payload
+
+
+async def _get_and_count_usage(db: AsyncSession, condition) -> Optional[dict]:
+    """
+    Get the chatbot matching condition and count a use of it
+    
+    Args:
+        db: Database session
+        condition: WHERE clause identifying one chatbot
+    
+    Returns:
+        Chatbot payload, or None if no chatbot matches
+    """
+    if get_redis() is not None:
+        result = await db.execute(select(Chatbot).where(condition))
+        chatbot = result.scalar_one_or_none()
+        if not chatbot:
+            return None
+        
+        pending = await record_usage(chatbot.id)
+        if pending is not None:
+            # Buffered in Redis; report the count including unflushed uses
+            payload = _chatbot_payload(chatbot)
+            payload["usage_count"] += pending
+            return payload
+    
+    # Write the increment straight through: increment and load in one statement
+    stmt = (
+        update(Chatbot)
+        .where(condition)
+        .values(usage_count=Chatbot.usage_count + 1)
+        .returning(Chatbot)
+        .execution_options(populate_existing=True)
+    )
+    result = await db.execute(stmt)
+    chatbot = result.scalar_one_or_none()
+    if not chatbot:
+        return None
+    
+    await db.commit()
+    return _chatbot_payload(chatbot)
+
+
+def _chatbot_payload(bot: Chatbot) -> dict:
+    """Build the ChatbotResponse-shaped dict for a chatbot"""
+    return {
+        "id": bot.id,
+        "name": bot.name,
+        "slug": bot.slug,
+        "description": bot.description,
+        "avatar_url": bot.avatar_url,
+        "category": bot.category,
+        "model": bot.model,
+        "suggested_prompts": bot.suggested_prompts or [],
+        "theme_color": bot.theme_color,
+        "is_featured": bot.is_featured,
+        "is_premium": bot.is_premium,
+        "tags": bot.tags or [],
+        "usage_count": bot.usage_count,
+        "rating": bot.rating,
+        "tools_enabled": bot.tools_enabled or []
+    }
+
+
+@router.get("/", responses={200: {"model": List[ChatbotResponse]}}, response_class=ORJSONResponse)
 async def get_chatbots(
+    request: Request,
     search: Optional[str] = Query(None, description="Search term"),
     category: Optional[str] = Query(None, description="Filter by category"),
     featured: Optional[bool] = Query(None, description="Filter featured bots"),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     db: AsyncSession = Depends(get_db)
-) -> List[ChatbotResponse]:
+) -> Response:
     """Get available chatbots with optional filtering"""
     try:
-        query = select(Chatbot).where(Chatbot.is_active == True)
+        key = _cache_key("list", {
+            "search": search,
+            "category": category,
+            "featured": featured,
+            "limit": limit,
+            "offset": offset,
+        })
+        body = await cache_get(key)
+        if body is not None:
+            return _json_with_etag(request, body)
+        
+        # Project only the response columns (no ORM instances)
+        query = select(*CHATBOT_RESPONSE_COLUMNS).where(Chatbot.is_active == True)
         
         # Apply filters
         if search:
@@ -88,67 +220,31 @@ async def get_chatbots(
         )
         
         result = await db.execute(query)
-        chatbots = result.scalars().all()
-        
-        return [
-            ChatbotResponse(
-                id=bot.id,
-                name=bot.name,
-                slug=bot.slug,
-                description=bot.description,
-                avatar_url=bot.avatar_url,
-                category=bot.category,
-                model=bot.model,
-                suggested_prompts=bot.suggested_prompts or [],
-                theme_color=bot.theme_color,
-                is_featured=bot.is_featured,
-                is_premium=bot.is_premium,
-                tags=bot.tags or [],
-                usage_count=bot.usage_count,
-                rating=bot.rating,
-                tools_enabled=bot.tools_enabled or []
-            )
-            for bot in chatbots
-        ]
+        rows = result.mappings().all()
+        
+        # ChatbotResponse only documents the shape; rows are not re-validated
+        body = orjson.dumps([_row_payload(row) for row in rows])
+        await cache_set(key, body, CHATBOT_LIST_CACHE_TTL)
+        return _json_with_etag(request, body)
         
     except Exception as e:
         logger.error(f"Error getting chatbots: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to get chatbots")
 
 
-@router.get("/{chatbot_id}", response_model=ChatbotResponse)
+@router.get("/{chatbot_id}", responses={200: {"model": ChatbotResponse}}, response_class=ORJSONResponse)
 async def get_chatbot(
     chatbot_id: str,
     db: AsyncSession = Depends(get_db)
-) -> ChatbotResponse:
+) -> ORJSONResponse:
     """Get a specific chatbot by ID"""
     try:
-        chatbot = await db.get(Chatbot, chatbot_id)
+        payload = await _get_and_count_usage(db, Chatbot.id == chatbot_id)
         
-        if not chatbot:
+        if not payload:
             raise HTTPException(status_code=404, detail="Chatbot not found")
         
-        # Increment usage count
-        chatbot.usage_count += 1
-        await db.commit()
-        
-        return ChatbotResponse(
-            id=chatbot.id,
-            name=chatbot.name,
-            slug=chatbot.slug,
-            description=chatbot.description,
-            avatar_url=chatbot.avatar_url,
-            category=chatbot.category,
-            model=chatbot.model,
-            suggested_prompts=chatbot.suggested_prompts or [],
-            theme_color=chatbot.theme_color,
-            is_featured=chatbot.is_featured,
-            is_premium=chatbot.is_premium,
-            tags=chatbot.tags or [],
-            usage_count=chatbot.usage_count,
-            rating=chatbot.rating,
-            tools_enabled=chatbot.tools_enabled or []
-        )
+        return ORJSONResponse(payload)
         
     except HTTPException:
         raise
@@ -157,41 +253,19 @@ async def get_chatbot(
         raise HTTPException(status_code=500, detail="Failed to get chatbot")
 
 
-@router.get("/slug/{slug}", response_model=ChatbotResponse)
+@router.get("/slug/{slug}", responses={200: {"model": ChatbotResponse}}, response_class=ORJSONResponse)
 async def get_chatbot_by_slug(
     slug: str,
     db: AsyncSession = Depends(get_db)
-) -> ChatbotResponse:
+) -> ORJSONResponse:
     """Get a chatbot by slug"""
     try:
-        query = select(Chatbot).where(Chatbot.slug == slug)
-        result = await db.execute(query)
-        chatbot = result.scalar_one_or_none()
+        payload = await _get_and_count_usage(db, Chatbot.slug == slug)
         
-        if not chatbot:
+        if not payload:
             raise HTTPException(status_code=404, detail="Chatbot not found")
         
-        # Increment usage count
-        chatbot.usage_count += 1
-        await db.commit()
-        
-        return ChatbotResponse(
-            id=chatbot.id,
-            name=chatbot.name,
-            slug=chatbot.slug,
-            description=chatbot.description,
-            avatar_url=chatbot.avatar_url,
-            category=chatbot.category,
-            model=chatbot.model,
-            suggested_prompts=chatbot.suggested_prompts or [],
-            theme_color=chatbot.theme_color,
-            is_featured=chatbot.is_featured,
-            is_premium=chatbot.is_premium,
-            tags=chatbot.tags or [],
-            usage_count=chatbot.usage_count,
-            rating=chatbot.rating,
-            tools_enabled=chatbot.tools_enabled or []
-        )
+        return ORJSONResponse(payload)
         
     except HTTPException:
         raise
@@ -202,15 +276,21 @@ async def get_chatbot_by_slug(
 
 @router.get("/categories/list")
 async def get_categories(
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ) -> List[str]:
     """Get list of available chatbot categories"""
     try:
-        query = select(Chatbot.category).distinct()
-        result = await db.execute(query)
-        categories = result.scalars().all()
+        # Categories are kept as a Redis set; rebuilt from the table on a miss
+        key = f"{CHATBOT_CACHE_PREFIX}category_set"
+        categories = await cache_smembers(key)
+        if not categories:
+            query = select(Chatbot.category).distinct()
+            result = await db.execute(query)
+            categories = result.scalars().all()
+            await cache_sadd(key, categories, CATEGORIES_CACHE_TTL)
         
-        return sorted(categories)
+        return _json_with_etag(request, orjson.dumps(sorted(categories)))
         
     except Exception as e:
         logger.error(f"Error getting categories: {str(e)}")
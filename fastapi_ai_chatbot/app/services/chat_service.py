@@ -4,21 +4,29 @@ Chat management service
 
 import json
 import uuid
-from typing import List, Optional, Dict, Any
+import orjson
+from typing import AsyncGenerator, List, Optional, Dict, Any, NamedTuple, Tuple
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, and_, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, update, delete, exists, desc, and_, func, tuple_
+from sqlalchemy.orm import selectinload, raiseload
 
 from app.models.chat import ChatSession, ChatMessage, MessageRole, MessageType
 from app.models.chatbot import Chatbot
 from app.models.user import User
 from app.core.config import settings
+from app.core.database import get_db_context
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class MessageRecord(NamedTuple):
+    """Identity of a message written through add_message_core"""
+    id: str
+    created_at: datetime
+
+
 class ChatService:
     """Service for managing chat sessions and messages"""
     
@@ -66,7 +74,9 @@ class ChatService:
     async def get_session(
         db: AsyncSession,
         session_id: str,
-        user_id: str
+        user_id: str,
+        with_chatbot: bool = True,
+        with_messages: bool = True
     ) -> Optional[ChatSession]:
         """
         Get a chat session
@@ -75,6 +85,8 @@ class ChatService:
             db: Database session
             session_id: Session ID
             user_id: User ID (for verification)
+            with_chatbot: Eager-load the chatbot relationship
+            with_messages: Eager-load the messages relationship
             
         Returns:
             Chat session if found
@@ -84,11 +96,16 @@ class ChatService:
                 ChatSession.id == session_id,
                 ChatSession.user_id == user_id
             )
-        ).options(
-            selectinload(ChatSession.chatbot),
-            selectinload(ChatSession.messages)
         )
         
+        if with_chatbot:
+            query = query.options(selectinload(ChatSession.chatbot))
+        if with_messages:
+            query = query.options(selectinload(ChatSession.messages))
+        
+        # Any relationship not loaded above raises instead of lazy loading
+        query = query.options(raiseload("*"))
+        
         result = await db.execute(query)
         return result.scalar_one_or_none()
     
@@ -149,63 +166,151 @@ class ChatService:
         Returns:
             Created message
         """
-        # Get session to ensure it exists and update counts
-        session = await db.get(ChatSession, session_id)
-        if not session:
+        # Bump counters and check the session exists in one statement
+        # (also syncs a ChatSession already loaded in this db session)
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(
+                message_count=ChatSession.message_count + 1,
+                last_activity=now,
+                updated_at=now
+            )
+            .returning(ChatSession.id)
+        )
+        if result.scalar_one_or_none() is None:
             raise ValueError(f"Session {session_id} not found")
         
-        # Create message
-        message = ChatMessage(
-            session_id=session_id,
-            role=role,
-            message_type=message_type,
-            content=[{
-                "type": "input_text" if role == MessageRole.USER else "output_text",
-                "text": content
-            }],
-            raw_content=content,
-            tool_name=tool_name,
-            tool_arguments=tool_arguments,
-            tool_output=tool_output
+        # Insert the message and get the full row back (no refresh query)
+        result = await db.execute(
+            insert(ChatMessage)
+            .values(
+                session_id=session_id,
+                role=role,
+                message_type=message_type,
+                content=[{
+                    "type": "input_text" if role == MessageRole.USER else "output_text",
+                    "text": content
+                }],
+                raw_content=content,
+                tool_name=tool_name,
+                tool_arguments=tool_arguments,
+                tool_output=tool_output
+            )
+            .returning(ChatMessage)
         )
-        
-        # Update session
-        session.message_count += 1
-        session.last_activity = datetime.now(timezone.utc)
-        session.updated_at = datetime.now(timezone.utc)
-        
-        db.add(message)
+        message = result.scalar_one()
         await db.commit()
-        await db.refresh(message)
         
         logger.info(f"Added message {message.id} to session {session_id}")
         return message
     
+    @staticmethod
+    async def add_message_core(
+        db: AsyncSession,
+        session_id: str,
+        role: MessageRole,
+        content: str,
+        message_type: MessageType = MessageType.MESSAGE
+    ) -> MessageRecord:
+        """
+        Insert a message with a Core INSERT ... RETURNING
+        
+        Skips the ORM unit of work and the refresh round-trip. Session
+        counters are not touched; follow up with touch_session.
+        
+        Args:
+            db: Database session
+            session_id: Session ID
+            role: Message role
+            content: Message content
+            message_type: Type of message
+            
+        Returns:
+            Id and creation time of the inserted message
+        """
+        result = await db.execute(
+            insert(ChatMessage)
+            .values(
+                session_id=session_id,
+                role=role,
+                message_type=message_type,
+                content=[{
+                    "type": "input_text" if role == MessageRole.USER else "output_text",
+                    "text": content
+                }],
+                raw_content=content
+            )
+            .returning(ChatMessage.id, ChatMessage.created_at)
+        )
+        record = MessageRecord(*result.one())
+        await db.commit()
+        
+        logger.info(f"Added message {record.id} to session {session_id}")
+        return record
+    
+    @staticmethod
+    async def touch_session(
+        db: AsyncSession,
+        session_id: str,
+        message_count: int
+    ) -> None:
+        """
+        Apply deferred session counter updates in a single UPDATE
+        
+        Args:
+            db: Database session
+            session_id: Session ID
+            message_count: Number of messages added since the last update
+        """
+        now = datetime.now(timezone.utc)
+        await db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(
+                message_count=ChatSession.message_count + message_count,
+                last_activity=now,
+                updated_at=now
+            )
+        )
+        await db.commit()
+    
     @staticmethod
     async def get_session_messages(
         db: AsyncSession,
         session_id: str,
-        limit: Optional[int] = None,
-        offset: int = 0
+        after: Optional[Tuple[datetime, str]] = None,
+        limit: Optional[int] = None
     ) -> List[ChatMessage]:
         """
-        Get messages for a session
+        Get messages for a session (keyset paginated)
         
         Args:
             db: Database session
             session_id: Session ID
+            after: Only return messages after this (created_at, id) cursor
+                (taken from the last message of the previous page)
             limit: Maximum number of messages
-            offset: Number of messages to skip
             
         Returns:
             List of messages
         """
         query = select(ChatMessage).where(
             ChatMessage.session_id == session_id
-        ).order_by(ChatMessage.created_at)
+        )
+        
+        # Seek on the (session_id, created_at) index instead of OFFSET; id
+        # breaks ties so rows sharing a timestamp aren't skipped across pages
+        if after is not None:
+            query = query.where(
+                tuple_(ChatMessage.created_at, ChatMessage.id) > tuple_(*after)
+            )
+        
+        query = query.order_by(ChatMessage.created_at, ChatMessage.id)
         
         if limit:
-            query = query.limit(limit).offset(offset)
+            query = query.limit(limit)
         
         result = await db.execute(query)
         return result.scalars().all()
@@ -235,6 +340,32 @@ class ChatService:
             return True
         return False
     
+    @staticmethod
+    async def _bulk_delete_sessions(db: AsyncSession, condition) -> int:
+        """
+        Delete sessions matching a condition, and their messages, in bulk
+        
+        Args:
+            db: Database session
+            condition: WHERE clause on ChatSession
+            
+        Returns:
+            Number of deleted sessions
+        """
+        # Bulk deletes bypass ORM cascades (and SQLite doesn't enforce
+        # ON DELETE CASCADE by default), so remove messages explicitly
+        await db.execute(
+            delete(ChatMessage)
+            .where(ChatMessage.session_id.in_(select(ChatSession.id).where(condition)))
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(
+            delete(ChatSession)
+            .where(condition)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
     @staticmethod
     async def cleanup_empty_sessions(
         db: AsyncSession
@@ -248,20 +379,16 @@ class ChatService:
         Returns:
             Number of deleted sessions
         """
-        # Find sessions with no messages
-        subquery = select(ChatMessage.session_id).distinct()
+        # Delete sessions with no messages in a single statement
+        has_messages = exists().where(ChatMessage.session_id == ChatSession.id)
         
-        query = select(ChatSession).where(
-            ~ChatSession.id.in_(subquery)
+        result = await db.execute(
+            delete(ChatSession)
+            .where(~has_messages)
+            .execution_options(synchronize_session=False)
         )
         
-        result = await db.execute(query)
-        empty_sessions = result.scalars().all()
-        
-        count = len(empty_sessions)
-        for session in empty_sessions:
-            await db.delete(session)
-        
+        count = result.rowcount
         await db.commit()
         logger.info(f"Deleted {count} empty sessions")
         return count
@@ -281,17 +408,11 @@ class ChatService:
         Returns:
             Number of deleted sessions
         """
-        query = select(ChatSession).where(
+        count = await ChatService._bulk_delete_sessions(
+            db,
             ChatSession.user_id == user_id
         )
         
-        result = await db.execute(query)
-        sessions = result.scalars().all()
-        
-        count = len(sessions)
-        for session in sessions:
-            await db.delete(session)
-        
         await db.commit()
         logger.info(f"Deleted all {count} sessions for user {user_id}")
         return count
@@ -313,17 +434,11 @@ class ChatService:
         """
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
         
-        query = select(ChatSession).where(
+        count = await ChatService._bulk_delete_sessions(
+            db,
             ChatSession.last_activity < cutoff_date
         )
         
-        result = await db.execute(query)
-        sessions = result.scalars().all()
-        
-        count = len(sessions)
-        for session in sessions:
-            await db.delete(session)
-        
         await db.commit()
         logger.info(f"Deleted {count} old sessions")
         return count
@@ -332,46 +447,68 @@ class ChatService:
     async def export_session(
         db: AsyncSession,
         session_id: str,
-        user_id: str,
-        format: str = "json"
-    ) -> Dict[str, Any]:
+        user_id: str
+    ) -> bytes:
         """
-        Export a chat session
+        Export a chat session as JSON
         
         Args:
             db: Database session
             session_id: Session ID
             user_id: User ID
-            format: Export format (json, markdown)
             
         Returns:
-            Exported session data
+            Exported session data, serialized as JSON
         """
         session = await ChatService.get_session(db, session_id, user_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
         
-        messages = await ChatService.get_session_messages(db, session_id)
+        # Eager-loaded by get_session, ordered by created_at
+        messages = session.messages
         
-        if format == "markdown":
-            # Convert to markdown format
-            markdown = f"# Chat Session: {session.name}\n\n"
-            markdown += f"**Date**: {session.created_at.strftime('%Y-%m-%d %H:%M')}\n"
-            markdown += f"**Chatbot**: {session.chatbot.name}\n\n"
-            markdown += "---\n\n"
-            
-            for msg in messages:
-                role = msg.role.value.capitalize()
-                content = msg.raw_content or ""
-                markdown += f"**{role}**: {content}\n\n"
+        return orjson.dumps({
+            "format": "json",
+            "session": session.to_dict(),
+            "chatbot": session.chatbot.to_dict(),
+            "messages": [msg.to_dict() for msg in messages]
+        })
+    
+    @staticmethod
+    async def stream_markdown_export(
+        session: ChatSession,
+        batch_size: int = 100
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Export a chat session as markdown, streamed chunk by chunk
+        
+        Messages are read in batches on a dedicated database session, so
+        memory stays flat however long the conversation is.
+        
+        Args:
+            session: Chat session (with chatbot loaded)
+            batch_size: Messages fetched per round trip
             
-            return {"format": "markdown", "content": markdown}
-        
-        else:
-            # Default to JSON
-            return {
-                "format": "json",
-                "session": session.to_dict(),
-                "chatbot": session.chatbot.to_dict(),
-                "messages": [msg.to_dict() for msg in messages]
-            }
\ No newline at end of file
+        Yields:
+            UTF-8 encoded markdown
+        """
+        yield (
+            f"# Chat Session: {session.name}\n\n"
+            f"**Date**: {session.created_at.strftime('%Y-%m-%d %H:%M')}\n"
+            f"**Chatbot**: {session.chatbot.name}\n\n"
+            "---\n\n"
+        ).encode()
+        
+        query = (
+            select(ChatMessage.role, ChatMessage.raw_content)
+            .where(ChatMessage.session_id == session.id)
+            .order_by(ChatMessage.created_at)
+            .execution_options(yield_per=batch_size)
+        )
+        async with get_db_context() as db:
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                yield "".join(
+                    f"**{role.value.capitalize()}**: {raw_content or ''}\n\n"
+                    for role, raw_content in rows
+                ).encode()
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+In-process TTL cache of chatbot configurations
+"""
+
+import time
+import logging
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chatbot import Chatbot
+
+logger = logging.getLogger(__name__)
+
+CHATBOT_CACHE_TTL = 300  # seconds
+
+# chatbot_id -> (detached snapshot, expiry timestamp)
+_cache: Dict[str, Tuple[Chatbot, float]] = {}
+
+
+def _snapshot(chatbot: Chatbot) -> Chatbot:
+    """Copy column values into a transient Chatbot not bound to any session"""
+    return Chatbot(**{
+        column.key: getattr(chatbot, column.key)
+        for column in Chatbot.__table__.columns
+    })
+
+
+async def get_chatbot(db: AsyncSession, chatbot_id: str) -> Optional[Chatbot]:
+    """
+    Get a chatbot configuration, served from memory while fresh
+    
+    The returned object is a read-only snapshot; do not add it to a session.
+    
+    Args:
+        db: Database session
+        chatbot_id: Chatbot ID
+    
+    Returns:
+        Chatbot snapshot if found
+    """
+    now = time.monotonic()
+    cached = _cache.get(chatbot_id)
+    if cached and cached[1] > now:
+        return cached[0]
+    
+    chatbot = await db.get(Chatbot, chatbot_id)
+    if not chatbot:
+        _cache.pop(chatbot_id, None)
+        return None
+    
+    snapshot = _snapshot(chatbot)
+    _cache[chatbot_id] = (snapshot, now + CHATBOT_CACHE_TTL)
+    return snapshot
+
+
+def invalidate_chatbot(chatbot_id: Optional[str] = None) -> None:
+    """
+    Drop cached chatbot configurations
+    
+    Args:
+        chatbot_id: Chatbot to drop, or None to clear the whole cache
+    """
+    if chatbot_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(chatbot_id, None)
@@ -0,0 +1,103 @@
+"""
+Redis cache of OpenAI-formatted chat history per session
+"""
+
+import logging
+from typing import List, Dict, Any, Optional
+
+import orjson
+
+from app.core.cache import get_redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MessageHistoryCache:
+    """Cache of OpenAI-format message lists, stored as Redis lists"""
+    
+    KEY_PREFIX = "chat:history:"
+    
+    def __init__(self):
+        """Initialize cache settings"""
+        self.enabled = settings.USE_REDIS_CACHE
+        self.ttl = settings.SESSION_EXPIRE_HOURS * 3600
+        self.max_messages = settings.MAX_MESSAGES_PER_SESSION
+    
+    @property
+    def client(self):
+        """Shared Redis client"""
+        return get_redis()
+    
+    def _key(self, session_id: str) -> str:
+        return f"{self.KEY_PREFIX}{session_id}"
+    
+    async def get(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get cached history for a session
+        
+        Args:
+            session_id: Session ID
+        
+        Returns:
+            Cached messages, or None on cache miss
+        """
+        if not self.enabled:
+            return None
+        
+        try:
+            items = await self.client.lrange(self._key(session_id), 0, -1)
+        except Exception as e:
+            logger.warning(f"History cache read failed for {session_id}: {str(e)}")
+            return None
+        
+        if not items:
+            return None
+        return [orjson.loads(item) for item in items]
+    
+    async def set(self, session_id: str, messages: List[Dict[str, Any]]) -> None:
+        """
+        Replace cached history for a session
+        
+        Args:
+            session_id: Session ID
+            messages: OpenAI-format messages
+        """
+        if not self.enabled or not messages:
+            return
+        
+        key = self._key(session_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                pipe.rpush(key, *(orjson.dumps(msg) for msg in messages[-self.max_messages:]))
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"History cache write failed for {session_id}: {str(e)}")
+    
+    async def append(self, session_id: str, *messages: Dict[str, Any]) -> None:
+        """
+        Append messages to cached history (no-op if the session isn't cached)
+        
+        Args:
+            session_id: Session ID
+            messages: OpenAI-format messages
+        """
+        if not self.enabled or not messages:
+            return
+        
+        key = self._key(session_id)
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                # RPUSHX never creates a partial history for an evicted key
+                pipe.rpushx(key, *(orjson.dumps(msg) for msg in messages))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"History cache append failed for {session_id}: {str(e)}")
+
+
+# Shared instance
+history_cache = MessageHistoryCache()
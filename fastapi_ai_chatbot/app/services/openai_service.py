@@ -5,10 +5,14 @@ OpenAI Integration Service with Streaming Support
 import json
 import asyncio
 import logging
-from typing import AsyncGenerator, List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import AsyncGenerator, List, Dict, Any, Optional, Tuple, Union
 from datetime import datetime
 from openai import AsyncOpenAI
+import httpx
+import orjson
 from openai.types.chat import ChatCompletionMessageParam
+import tiktoken
 import time
 
 from app.core.config import settings
@@ -17,32 +21,118 @@ from app.models.chatbot import Chatbot
 
 logger = logging.getLogger(__name__)
 
+# model -> tiktoken encoding (only successfully loaded ones)
+_ENCODINGS: Dict[str, tiktoken.Encoding] = {}
+
+
+def _load_encoding(model: str) -> tiktoken.Encoding:
+    """Load the tiktoken encoding for a model (may download the BPE file)"""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Unknown model name: use the current OpenAI encoding
+        return tiktoken.get_encoding("o200k_base")
+
+
+async def _get_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """Get (and memoize) the tiktoken encoding for a model"""
+    encoding = _ENCODINGS.get(model)
+    if encoding is None:
+        # First use may fetch the BPE file over HTTP; keep it off the event
+        # loop, and don't cache failures so a transient error can recover
+        try:
+            encoding = await asyncio.to_thread(_load_encoding, model)
+        except Exception as e:
+            logger.warning(f"Could not load tiktoken encoding for {model}: {str(e)}")
+            return None
+        _ENCODINGS[model] = encoding
+    return encoding
+
+
+# SSE wire framing, shared with the chat router's frame encoding
+SSE_DATA_PREFIX = b"data: "
+SSE_SEPARATOR = b"\n\n"
+SSE_DONE_FRAME = SSE_DATA_PREFIX + b"[DONE]" + SSE_SEPARATOR
+
+
+def sse_frame(event: str, data: Dict[str, Any]) -> bytes:
+    """Encode an event as an SSE frame in the wire format the frontend reads"""
+    return SSE_DATA_PREFIX + orjson.dumps({"event": event, "data": data}) + SSE_SEPARATOR
+
+
+# Shared OpenAI client: one connection pool for the whole process
+OPENAI_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+OPENAI_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client, creating it on first use"""
+    global _client
+    if _client is None:
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(limits=OPENAI_HTTP_LIMITS, timeout=OPENAI_HTTP_TIMEOUT),
+        )
+    return _client
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client's connection pool"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# system prompt -> prebuilt system message (bounded LRU)
+SYSTEM_MESSAGE_CACHE_SIZE = 1000
+_system_messages: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+
+
+def _system_message(system_prompt: str) -> Dict[str, str]:
+    """Get the OpenAI system message for a prompt, built once per prompt"""
+    message = _system_messages.get(system_prompt)
+    if message is None:
+        message = {"role": "system", "content": system_prompt}
+        _system_messages[system_prompt] = message
+        if len(_system_messages) > SYSTEM_MESSAGE_CACHE_SIZE:
+            _system_messages.popitem(last=False)
+    else:
+        _system_messages.move_to_end(system_prompt)
+    return message
+
 
 class OpenAIService:
     """Service for OpenAI API integration"""
     
     def __init__(self):
-        """Initialize OpenAI client"""
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        """Bind the shared OpenAI client"""
+        if not settings.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY is not configured")
+        self.client = get_openai_client()
         
     async def stream_chat(
         self,
-        messages: List[ChatMessage],
+        messages: List[Dict[str, Any]],
         chatbot: Chatbot,
         session_id: str,
         tools: Optional[List[Dict[str, Any]]] = None
-    ) -> AsyncGenerator[Dict[str, Any], None]:
+    ) -> AsyncGenerator[Union[bytes, Dict[str, Any]], None]:
         """
         Stream chat responses from OpenAI
         
+        High-frequency delta events are yielded already encoded as SSE
+        frames (bytes); all other events are yielded as dicts.
+        
         Args:
-            messages: List of chat messages
+            messages: Conversation history in OpenAI message format
             chatbot: Chatbot configuration
             session_id: Current session ID
             tools: Optional list of tools/functions
             
         Yields:
-            SSE formatted events
+            SSE frames (bytes) or event dicts
         """
         try:
             # Convert messages to OpenAI format
@@ -53,20 +143,18 @@ class OpenAIService:
             
             # Create chat completion with streaming
             stream = await self.client.chat.completions.create(
-                model=chatbot.model or settings.OPENAI_MODEL,
                 messages=formatted_messages,
-                temperature=chatbot.temperature or settings.OPENAI_TEMPERATURE,
-                max_tokens=chatbot.max_tokens or settings.OPENAI_MAX_TOKENS,
-                top_p=chatbot.top_p or 1.0,
-                frequency_penalty=chatbot.frequency_penalty or 0.0,
-                presence_penalty=chatbot.presence_penalty or 0.0,
                 stream=True,
                 tools=tools if tools and chatbot.tools_enabled else None,
+                **chatbot.sampling_kwargs,
             )
             
             # Process stream events
             current_message = ""
             current_tool_calls = {}
+            # Tool call receiving argument deltas; only the first delta of a
+            # call carries its id, later ones continue the active call
+            active_tool = None
             message_id = f"msg_{int(time.time() * 1000)}"
             
             async for chunk in stream:
@@ -78,22 +166,18 @@ class OpenAIService:
                 # Handle content streaming
                 if delta.content:
                     current_message += delta.content
-                    yield {
-                        "event": "response.output_text.delta",
-                        "data": {
-                            "delta": delta.content,
-                            "item_id": message_id,
-                            "text": current_message
-                        }
-                    }
+                    yield sse_frame("response.output_text.delta", {
+                        "delta": delta.content,
+                        "item_id": message_id,
+                        "text": current_message
+                    })
                 
                 # Handle tool calls
                 if delta.tool_calls:
                     for tool_call in delta.tool_calls:
-                        tool_id = tool_call.id or f"tool_{int(time.time() * 1000)}"
-                        
-                        if tool_id not in current_tool_calls:
-                            current_tool_calls[tool_id] = {
+                        if active_tool is None or (tool_call.id and tool_call.id != active_tool["id"]):
+                            tool_id = tool_call.id or f"tool_{int(time.time() * 1000)}"
+                            active_tool = current_tool_calls[tool_id] = {
                                 "id": tool_id,
                                 "name": tool_call.function.name if tool_call.function else None,
                                 "arguments": ""
@@ -115,14 +199,11 @@ class OpenAIService:
                         
                         # Stream tool arguments
                         if tool_call.function and tool_call.function.arguments:
-                            current_tool_calls[tool_id]["arguments"] += tool_call.function.arguments
-                            yield {
-                                "event": "response.function_call_arguments.delta",
-                                "data": {
-                                    "delta": tool_call.function.arguments,
-                                    "item_id": tool_id
-                                }
-                            }
+                            active_tool["arguments"] += tool_call.function.arguments
+                            yield sse_frame("response.function_call_arguments.delta", {
+                                "delta": tool_call.function.arguments,
+                                "item_id": active_tool["id"]
+                            })
                 
                 # Check for finish reason
                 if chunk.choices and chunk.choices[0].finish_reason:
@@ -190,32 +271,39 @@ class OpenAIService:
                 }
             }
     
-    def _format_messages(self, messages: List[ChatMessage], chatbot: Chatbot) -> List[ChatCompletionMessageParam]:
+    def _format_messages(self, messages: List[Dict[str, Any]], chatbot: Chatbot) -> List[ChatCompletionMessageParam]:
         """
         Format messages for OpenAI API
         
         Args:
-            messages: List of chat messages
+            messages: Conversation history in OpenAI message format
             chatbot: Chatbot configuration
             
         Returns:
             Formatted messages for OpenAI API
         """
-        formatted = []
-        
-        # Add system prompt
+        # History is already in OpenAI format (see history_cache), so only
+        # the shared system message is put in front of it
         if chatbot.system_prompt:
-            formatted.append({
-                "role": "system",
-                "content": chatbot.system_prompt
-            })
+            return [_system_message(chatbot.system_prompt), *messages]
+        return messages
+    
+    @staticmethod
+    def to_openai_messages(messages: List[ChatMessage]) -> List[Dict[str, Any]]:
+        """
+        Convert stored chat messages to OpenAI message format
         
-        # Add conversation messages
+        Args:
+            messages: List of chat messages
+            
+        Returns:
+            Messages that have an OpenAI representation
+        """
+        formatted = []
         for msg in messages:
             openai_msg = msg.to_openai_format()
             if openai_msg:
                 formatted.append(openai_msg)
-        
         return formatted
     
     async def execute_tool(
@@ -265,6 +353,31 @@ class OpenAIService:
                 "error": f"Unknown tool: {tool_name}"
             }
     
+    async def execute_tools_batch(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute several tool calls concurrently
+        
+        Args:
+            calls: (tool_name, arguments) pairs
+            
+        Returns:
+            Tool execution results, in the same order as calls
+        """
+        results = await asyncio.gather(
+            *(self.execute_tool(name, arguments) for name, arguments in calls),
+            return_exceptions=True
+        )
+        
+        # One failing tool must not discard the others' results
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Error executing tool {calls[i][0]}: {str(result)}")
+                results[i] = {"error": str(result)}
+        return results
+    
     async def count_tokens(self, text: str, model: str = None) -> int:
         """
         Count tokens in text
@@ -276,5 +389,24 @@ class OpenAIService:
         Returns:
             Token count
         """
-        # Rough estimation - in production, use tiktoken library
-        return len(text.split()) * 1.3
\ No newline at end of file
+        encoding = await _get_encoding(model or settings.OPENAI_MODEL)
+        if encoding is None:
+            # Rough estimation when the encoding is unavailable
+            return int(len(text.split()) * 1.3)
+        return len(encoding.encode_ordinary(text))
+    
+    async def count_tokens_batch(self, texts: List[str], model: str = None) -> List[int]:
+        """
+        Count tokens for several texts (encoded in parallel by tiktoken)
+        
+        Args:
+            texts: Texts to count tokens for
+            model: Model to use for tokenization
+            
+        Returns:
+            Token count per text
+        """
+        encoding = await _get_encoding(model or settings.OPENAI_MODEL)
+        if encoding is None:
+            return [int(len(text.split()) * 1.3) for text in texts]
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=4)]
\ No newline at end of file
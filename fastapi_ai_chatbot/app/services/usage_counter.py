@@ -0,0 +1,101 @@
+"""
+Chatbot usage counting buffered in Redis and flushed to the database
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import update, bindparam
+
+from app.core.cache import get_redis
+from app.core.database import get_db_context
+from app.models.chatbot import Chatbot
+
+logger = logging.getLogger(__name__)
+
+USAGE_KEY_PREFIX = "cb:use:"
+USAGE_FLUSH_INTERVAL = 30  # seconds
+
+
+async def record_usage(chatbot_id: str) -> Optional[int]:
+    """
+    Count one use of a chatbot in Redis
+    
+    Args:
+        chatbot_id: Chatbot ID
+    
+    Returns:
+        Uses not yet flushed to the database (including this one),
+        or None when Redis is unavailable and the caller must write directly
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        return await client.incr(f"{USAGE_KEY_PREFIX}{chatbot_id}")
+    except Exception as e:
+        logger.warning(f"Usage counter increment failed for {chatbot_id}: {str(e)}")
+        return None
+
+
+async def flush_usage_counts() -> int:
+    """
+    Move buffered usage counts into chatbots.usage_count
+    
+    Returns:
+        Number of chatbots updated
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+    
+    keys = [key async for key in client.scan_iter(match=f"{USAGE_KEY_PREFIX}*")]
+    if not keys:
+        return 0
+    
+    # GETDEL is atomic: increments racing the flush land in a fresh key
+    async with client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.getdel(key)
+        values = await pipe.execute()
+    
+    params = [
+        {"b_id": key.decode()[len(USAGE_KEY_PREFIX):], "delta": int(value)}
+        for key, value in zip(keys, values)
+        if value
+    ]
+    if not params:
+        return 0
+    
+    # One executemany UPDATE for all counters
+    stmt = (
+        update(Chatbot.__table__)
+        .where(Chatbot.__table__.c.id == bindparam("b_id"))
+        .values(usage_count=Chatbot.__table__.c.usage_count + bindparam("delta"))
+    )
+    async with get_db_context() as db:
+        await db.execute(stmt, params)
+    
+    logger.info(f"Flushed usage counts for {len(params)} chatbots")
+    return len(params)
+
+
+async def run_usage_flusher(interval: int = USAGE_FLUSH_INTERVAL) -> None:
+    """Flush usage counts periodically until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        # Shielded: counts drained from Redis must reach the database even if
+        # cancellation arrives mid-flush
+        flush = asyncio.ensure_future(flush_usage_counts())
+        try:
+            await asyncio.shield(flush)
+        except asyncio.CancelledError:
+            # Finish the in-progress flush before stopping
+            try:
+                await flush
+            except Exception as e:
+                logger.error(f"Error flushing usage counts: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Error flushing usage counts: {str(e)}")
@@ -3,54 +3,26 @@ Seed initial data for the application
 """
 
 import logging
-from sqlalchemy import select
+from typing import Any, Dict, Final, Literal, Tuple
+from sqlalchemy import select, insert, delete, literal, text
+from app.core.cache import cache_delete_pattern
 from app.core.database import get_db_context
+from app.models.chat import ChatSession, ChatMessage
 from app.models.chatbot import Chatbot
+from app.services.chatbot_cache import invalidate_chatbot
 
 logger = logging.getLogger(__name__)
 
+# Set once this process has seeded or seen existing chatbots
+_seeded = False
 
-async def seed_initial_chatbots():
-    """Seed initial chatbots (will recreate if they exist)"""
-    try:
-        async with get_db_context() as db:
-            # Delete all existing chatbots
-            existing_chatbots = await db.execute(select(Chatbot))
-            for chatbot in existing_chatbots.scalars().all():
-                await db.delete(chatbot)
-            await db.commit()
-            logger.info("Cleared existing chatbots")
-            
-            # Create initial chatbots
-            chatbots = [
-                Chatbot(
-                    name="汎用アシスタント",
-                    slug="general-assistant",
-                    description="日常的な質問、調べ物、相談など幅広いトピックについて自然な日本語でサポートします。",
-                    category="general",
-                    model="gpt-4o",
-                    system_prompt="""あなたは親切で知識豊富なAIアシスタントです。
+# System prompts for the seed chatbots
+_SYS_PROMPT_GENERAL: Final[str] = """あなたは親切で知識豊富なAIアシスタントです。
 ユーザーの様々な質問に対して、正確で分かりやすい情報を提供します。
 日本語で自然な会話を心がけ、必要に応じて具体例や詳細な説明を含めて回答してください。
-ユーザーの立場に立って、親身になってサポートしてください。""",
-                    suggested_prompts=[
-                        "今日のニュースについて教えて",
-                        "健康的な食事のアドバイスをください",
-                        "仕事の効率を上げる方法は？",
-                        "おすすめの本を教えて"
-                    ],
-                    theme_color="#667eea",
-                    is_featured=True,
-                    tools_enabled=["web_search"],
-                    tags=["general", "日本語", "相談"]
-                ),
-                Chatbot(
-                    name="小説執筆アシスタント",
-                    slug="novel-writer",
-                    description="小説やストーリー創作をサポート。プロット作成、キャラクター設定、文章表現など創作活動全般をお手伝いします。",
-                    category="creative",
-                    model="gpt-4o",
-                    system_prompt="""あなたは経験豊富な小説家・創作指導者です。
+ユーザーの立場に立って、親身になってサポートしてください。"""
+
+_SYS_PROMPT_NOVEL: Final[str] = """あなたは経験豊富な小説家・創作指導者です。
 ユーザーの創作活動を全面的にサポートし、以下の分野で専門的なアドバイスを提供してください：
 
 ・プロット構成と物語構造の設計
@@ -60,25 +32,9 @@ async def seed_initial_chatbots():
 ・ジャンル別の執筆技術（ミステリー、恋愛、SF、ファンタジーなど）
 
 創造性を重視し、読者を引きつける作品作りを目指してください。
-具体的な例やテクニックを交えながら、実践的な指導を心がけてください。""",
-                    suggested_prompts=[
-                        "魅力的な主人公の作り方を教えて",
-                        "ミステリー小説のトリックアイデア",
-                        "恋愛シーンの自然な書き方",
-                        "読者を引きつける冒頭の書き方"
-                    ],
-                    theme_color="#f59e0b",
-                    is_featured=True,
-                    tools_enabled=[],
-                    tags=["creative", "writing", "novel", "日本語"]
-                ),
-                Chatbot(
-                    name="学習チューター",
-                    slug="learning-tutor",
-                    description="新しい知識を体系的に学習できるよう、会話形式で分かりやすく教えてくれる個人指導者です。",
-                    category="education",
-                    model="gpt-4o",
-                    system_prompt="""あなたは優秀な個人指導教師です。
+具体的な例やテクニックを交えながら、実践的な指導を心がけてください。"""
+
+_SYS_PROMPT_TUTOR: Final[str] = """あなたは優秀な個人指導教師です。
 ユーザーが新しい分野の知識を効率的に習得できるよう、以下の教育方針でサポートしてください：
 
 ・基礎から応用まで体系的なカリキュラムを提示
@@ -89,26 +45,115 @@ async def seed_initial_chatbots():
 ・学習者のモチベーション維持
 
 難しい概念も分かりやすく説明し、学習者が「なるほど！」と納得できる指導を心がけてください。
-質問を積極的に投げかけ、能動的な学習を促進してください。""",
-                    suggested_prompts=[
-                        "プログラミングを基礎から学びたい",
-                        "経済学の基本概念を教えて",
-                        "統計学を実践的に学びたい",
-                        "歴史を体系的に理解したい"
-                    ],
-                    theme_color="#10b981",
-                    is_featured=True,
-                    tools_enabled=["web_search"],
-                    tags=["education", "learning", "tutorial", "日本語"]
+質問を積極的に投げかけ、能動的な学習を促進してください。"""
+
+# Initial chatbots, inserted as-is with insert(Chatbot)
+_SEED_CHATBOTS: Tuple[Dict[str, Any], ...] = (
+    {
+        "name": "汎用アシスタント",
+        "slug": "general-assistant",
+        "description": "日常的な質問、調べ物、相談など幅広いトピックについて自然な日本語でサポートします。",
+        "category": "general",
+        "model": "gpt-4o",
+        "system_prompt": _SYS_PROMPT_GENERAL,
+        "suggested_prompts": [
+            "今日のニュースについて教えて",
+            "健康的な食事のアドバイスをください",
+            "仕事の効率を上げる方法は？",
+            "おすすめの本を教えて"
+        ],
+        "theme_color": "#667eea",
+        "is_featured": True,
+        "tools_enabled": ["web_search"],
+        "tags": ["general", "日本語", "相談"]
+    },
+    {
+        "name": "小説執筆アシスタント",
+        "slug": "novel-writer",
+        "description": "小説やストーリー創作をサポート。プロット作成、キャラクター設定、文章表現など創作活動全般をお手伝いします。",
+        "category": "creative",
+        "model": "gpt-4o",
+        "system_prompt": _SYS_PROMPT_NOVEL,
+        "suggested_prompts": [
+            "魅力的な主人公の作り方を教えて",
+            "ミステリー小説のトリックアイデア",
+            "恋愛シーンの自然な書き方",
+            "読者を引きつける冒頭の書き方"
+        ],
+        "theme_color": "#f59e0b",
+        "is_featured": True,
+        "tools_enabled": [],
+        "tags": ["creative", "writing", "novel", "日本語"]
+    },
+    {
+        "name": "学習チューター",
+        "slug": "learning-tutor",
+        "description": "新しい知識を体系的に学習できるよう、会話形式で分かりやすく教えてくれる個人指導者です。",
+        "category": "education",
+        "model": "gpt-4o",
+        "system_prompt": _SYS_PROMPT_TUTOR,
+        "suggested_prompts": [
+            "プログラミングを基礎から学びたい",
+            "経済学の基本概念を教えて",
+            "統計学を実践的に学びたい",
+            "歴史を体系的に理解したい"
+        ],
+        "theme_color": "#10b981",
+        "is_featured": True,
+        "tools_enabled": ["web_search"],
+        "tags": ["education", "learning", "tutorial", "日本語"]
+    }
+)
+
+
+async def seed_initial_chatbots(mode: Literal["recreate", "if_empty"] = "if_empty"):
+    """
+    Seed initial chatbots
+    
+    Args:
+        mode: "recreate" replaces existing chatbots (and their sessions);
+            "if_empty" only seeds when there are no chatbots yet
+    """
+    global _seeded
+    if mode == "if_empty" and _seeded:
+        return
+    
+    try:
+        async with get_db_context() as db:
+            # Re-runnable bootstrap data: don't wait for the WAL flush on commit
+            if db.bind.dialect.name == "postgresql":
+                await db.execute(text("SET LOCAL synchronous_commit = OFF"))
+            
+            # Cheap probe: one constant row, no chatbot columns loaded
+            probe = await db.execute(select(literal(1)).select_from(Chatbot).limit(1))
+            if probe.first() is not None:
+                if mode == "if_empty":
+                    _seeded = True
+                    logger.info("Chatbots already exist, skipping seed")
+                    return
+                
+                # Delete all existing chatbots (bulk DELETEs don't run ORM
+                # cascades, so their sessions and messages are removed first)
+                session_ids = select(ChatSession.id).where(
+                    ChatSession.chatbot_id.in_(select(Chatbot.id))
                 )
-            ]
+                await db.execute(delete(ChatMessage).where(ChatMessage.session_id.in_(session_ids)))
+                await db.execute(delete(ChatSession).where(ChatSession.id.in_(session_ids)))
+                await db.execute(delete(Chatbot))
+                logger.info("Cleared existing chatbots")
             
-            # Add all chatbots
-            for chatbot in chatbots:
-                db.add(chatbot)
+            # Create initial chatbots in one statement (column defaults still apply)
+            await db.execute(insert(Chatbot), list(_SEED_CHATBOTS))
             
+            # Clear and re-seed in one transaction
             await db.commit()
-            logger.info(f"Seeded {len(chatbots)} initial chatbots")
+            _seeded = True
+            logger.info(f"Seeded {len(_SEED_CHATBOTS)} initial chatbots")
+        
+        # Chatbots were recreated with new ids; drop cached listings and
+        # this process's configuration snapshots
+        await cache_delete_pattern("chatbots:*")
+        invalidate_chatbot()
             
     except Exception as e:
         logger.error(f"Error seeding chatbots: {str(e)}")
\ No newline at end of file
@@ -3,14 +3,30 @@
 Run the FastAPI AI Chatbot application
 """
 
+import asyncio
 import os
+import re
 import sys
-import asyncio
 import uvicorn
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parent
+ENV_PATH = ROOT / ".env"
+EXAMPLE_PATH = ROOT / ".env.example"
+
 # Add project root to path
-sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(ROOT))
+
+async def seed_chatbots():
+    """Create the schema and reset chatbots once, before workers start"""
+    from app.core.database import init_db, close_db
+    from app.utils.seed_data import seed_initial_chatbots
+    
+    try:
+        await init_db()
+        await seed_initial_chatbots(mode="recreate")
+    finally:
+        await close_db()
 
 def main():
     """Main entry point"""
@@ -19,22 +35,20 @@ def main():
     print("="*60)
     
     # Check for .env file
-    env_path = Path(__file__).parent / ".env"
-    if not env_path.exists():
+    if not ENV_PATH.is_file():
         print("\n⚠️  Warning: .env file not found!")
         print("Creating .env from .env.example...")
         
-        example_path = Path(__file__).parent / ".env.example"
-        if example_path.exists():
+        if EXAMPLE_PATH.is_file():
             import shutil
-            shutil.copy(example_path, env_path)
+            shutil.copy(EXAMPLE_PATH, ENV_PATH)
             print("✅ .env file created. Please update OPENAI_API_KEY!")
         else:
             print("❌ .env.example not found. Please create .env manually.")
     
     # Check for OpenAI API key
     from dotenv import load_dotenv
-    load_dotenv()
+    load_dotenv(ENV_PATH)
     
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key or api_key == "your_openai_api_key_here":
@@ -46,24 +60,23 @@ def main():
         if response.lower() == 'y':
             api_key = input("Enter your OpenAI API key: ").strip()
             if api_key:
-                # Update .env file
-                with open(env_path, 'r') as f:
-                    lines = f.readlines()
-                
-                with open(env_path, 'w') as f:
-                    for line in lines:
-                        if line.startswith("OPENAI_API_KEY"):
-                            f.write(f"OPENAI_API_KEY={api_key}\n")
-                        else:
-                            f.write(line)
+                # Update .env file (replace the key line, or append one)
+                content = ENV_PATH.read_text() if ENV_PATH.is_file() else ""
+                key_line = f"OPENAI_API_KEY={api_key}"
+                content, count = re.subn(r"^OPENAI_API_KEY=.*$", lambda _: key_line, content, flags=re.M)
+                if not count:
+                    if content and not content.endswith("\n"):
+                        content += "\n"
+                    content += key_line + "\n"
+                ENV_PATH.write_text(content)
                 
                 print("✅ API key saved to .env file")
                 os.environ["OPENAI_API_KEY"] = api_key
             else:
                 print("❌ No API key provided. The app may not function properly.")
     
-    # Import app after loading environment
-    from app.main import app
+    # Import settings after loading environment; uvicorn imports the app
+    # itself from the "app.main:app" string, so it isn't imported here
     from app.core.config import settings
     
     print(f"\n🚀 Starting server...")
@@ -74,13 +87,31 @@ def main():
     print("="*60 + "\n")
     
     # Run the application
-    uvicorn.run(
-        "app.main:app",
-        host=settings.APP_HOST,
-        port=settings.APP_PORT,
-        reload=settings.APP_RELOAD,
-        log_level="info"
-    )
+    if settings.APP_RELOAD:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.APP_HOST,
+            port=settings.APP_PORT,
+            reload=True,
+            log_level="info"
+        )
+    else:
+        if settings.APP_WORKERS > 1:
+            # Every worker runs the app's startup; seed here so they don't
+            # each recreate the chatbots (workers then only seed if empty)
+            asyncio.run(seed_chatbots())
+        
+        # uvicorn[standard] provides uvloop (not on Windows) and httptools;
+        # require them rather than silently falling back to asyncio/h11
+        uvicorn.run(
+            "app.main:app",
+            host=settings.APP_HOST,
+            port=settings.APP_PORT,
+            workers=settings.APP_WORKERS,
+            loop="auto" if sys.platform == "win32" else "uvloop",
+            http="httptools",
+            log_level="info"
+        )
 
 if __name__ == "__main__":
     try:
@@ -205,6 +205,20 @@ class APIManager {
      * Export session
      */
     async exportSession(sessionId, format = 'json') {
+        if (format === 'markdown') {
+            // Markdown is streamed as text/markdown, not JSON
+            const response = await fetch(`${this.baseURL}/api/chat/sessions/${sessionId}/export?format=markdown`, {
+                credentials: 'include'
+            });
+            
+            if (!response.ok) {
+                const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+                throw new Error(error.detail || `HTTP ${response.status}`);
+            }
+            
+            return { format: 'markdown', content: await response.text() };
+        }
+        
         return this.request('GET', `/api/chat/sessions/${sessionId}/export?format=${format}`);
     }
     